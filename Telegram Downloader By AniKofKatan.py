@@ -4,11 +4,28 @@ Made by Twisted Fate [fxp]
 Telegram Video Downloader - Downloads videos from a Telegram channel/group
 """
 
-import asyncio, os, time, threading, sys, logging, json, signal, shutil
+import asyncio, os, re, time, threading, sys, logging, json, signal, shutil, collections
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
 from dotenv import load_dotenv
 from pathlib import Path
 
+try:
+    from pyroaring import BitMap  # compressed integer set, ~10x smaller than JSON
+except ImportError:
+    BitMap = None
+
+try:
+    import orjson  # C serializer, several times faster than stdlib json
+except ImportError:
+    orjson = None
+
+def _json_loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _json_dumps(obj):
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode()
+
 # ─── LOAD ENVIRONMENT VARIABLES ───────────────────────────────────────────────
 load_dotenv()
 
@@ -34,6 +51,7 @@ session_name = os.getenv('TELEGRAM_SESSION', 'downloader_session')
 
 # ─── SOURCE CHANNEL/GROUP ──────────────────────────────────────────────────────
 source_group = int(os.getenv('SOURCE_GROUP', '-100123123123'))
+_group_suffix = str(source_group)[4:]  # for t.me/c/... links
 
 # ─── SETTINGS ──────────────────────────────────────────────────────────────────
 download_folder = Path(os.getenv('DOWNLOAD_FOLDER', 'downloads'))
@@ -41,6 +59,8 @@ progress_file = Path(os.getenv('PROGRESS_FILE', 'download_progress.json'))
 min_file_size = int(os.getenv('MIN_SIZE_MB', '1')) * 1024 * 1024
 max_file_size = int(os.getenv('MAX_SIZE_MB', '2000')) * 1024 * 1024
 max_disk_usage_gb = float(os.getenv('MAX_DISK_GB', '300'))
+worker_count = int(os.getenv('WORKER_COUNT', '2'))  # keep low to avoid FLOOD_WAIT
+_sanitize = re.compile(r'[^A-Za-z0-9._\- ]')  # filename cleaner, runs in C
 
 # ─── STATE VARIABLES ───────────────────────────────────────────────────────────
 class Stats:
@@ -49,61 +69,91 @@ class Stats:
         self.failed = 0
         self.skipped = 0
         self.start_time = time.time()
-        self.skip_current = False
 
 stats = Stats()
 client = None
+skip_events = {}  # msg.id -> asyncio.Event, one per in-flight download
 
 # ─── SIGNAL HANDLING ───────────────────────────────────────────────────────────
 def setup_signal_handlers():
     def signal_handler(sig, frame):
         logger.info("Received termination signal. Cleaning up...")
         print("\n⚠️ Program terminating. Cleaning up...")
+        _save_progress_sync()
+        save_lru()
         if client and client.is_connected():
             asyncio.create_task(client.disconnect())
         sys.exit(0)
     
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    if hasattr(signal, 'SIGUSR1'):  # kill -USR1 <pid> also skips the current file
+        signal.signal(signal.SIGUSR1, lambda *_: skip_oldest())
+
+def skip_oldest():
+    """Skip the oldest in-flight download"""
+    if skip_events:
+        skip_events[min(skip_events)].set()
+        print("\n⏩ Skipping current file...")
+
+def _feed_skip_buf(buf, ch):
+    """Accumulate keystrokes and fire the skip on 'ss'"""
+    buf += ch
+    if buf.endswith('ss'):
+        skip_oldest()
+        return ''
+    return buf[-10:]
 
 def key_listener():
-    """Listen for 'ss' to skip current operation"""
+    """Poll msvcrt for 'ss' (Windows only; Unix wires stdin into the loop)"""
+    import msvcrt
     buf = ''
     while True:
         try:
-            if os.name == 'nt':  # Windows
-                import msvcrt
-                if msvcrt.kbhit():
-                    buf += msvcrt.getch().decode('utf-8', errors='ignore')
-            else:  # Unix
-                import termios, tty, select
-                old_settings = termios.tcgetattr(sys.stdin)
-                try:
-                    tty.setcbreak(sys.stdin.fileno())
-                    if select.select([sys.stdin], [], [], 0.1)[0]:
-                        buf += sys.stdin.read(1)
-                finally:
-                    termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
-            
-            if buf.endswith('ss'):
-                stats.skip_current = True
-                print("\n⏩ Skipping current file...")
-                buf = ''
-            elif len(buf) > 10:
-                buf = buf[-10:]
-            
-            time.sleep(0.1)
+            if msvcrt.kbhit():
+                buf = _feed_skip_buf(buf, msvcrt.getch().decode('utf-8', errors='ignore'))
+            else:
+                time.sleep(0.1)
         except Exception as e:
             logger.error(f"Key listener error: {e}")
             time.sleep(1)
 
+_stdin_buf = ''
+def _on_stdin():
+    """add_reader callback, fired only when bytes actually arrive on stdin"""
+    global _stdin_buf
+    ch = os.read(sys.stdin.fileno(), 1).decode('utf-8', errors='ignore')
+    if ch:
+        _stdin_buf = _feed_skip_buf(_stdin_buf, ch)
+
+def setup_skip_listener():
+    """Wire up the 'ss' skip input; no polling thread on Unix"""
+    if os.name == 'nt':  # Windows console handles don't support add_reader
+        threading.Thread(target=key_listener, daemon=True).start()
+        return
+    try:
+        import termios, tty, atexit
+        old_settings = termios.tcgetattr(sys.stdin)
+        atexit.register(termios.tcsetattr, sys.stdin, termios.TCSADRAIN, old_settings)
+        tty.setcbreak(sys.stdin.fileno())
+        asyncio.get_running_loop().add_reader(sys.stdin.fileno(), _on_stdin)
+    except Exception as e:  # e.g. stdin is not a tty
+        logger.error(f"Skip listener unavailable: {e}")
+
 # ─── PROGRESS BAR ──────────────────────────────────────────────────────────────
 _start_time = {}
+_last_print = {}
 def _progress(current, total, label, file_id):
-    """Display progress bar with speed and ETA"""
-    if stats.skip_current:
+    """Display progress bar with speed and ETA (redrawn at most every 100 ms)"""
+    skip = skip_events.get(int(file_id))
+    if skip and skip.is_set():
         raise Exception("Skipped by user")
-        
+
+    now = time.time()
+    if now - _last_print.get(file_id, 0) < 0.1 and current < total:
+        return
+    _last_print[file_id] = now
+
     if current == 0 or file_id not in _start_time:
         _start_time[file_id] = time.time()
     
@@ -139,143 +189,365 @@ def print_summary():
           f"⛔ {stats.skipped} | ⏱ {time_str}")
 
 # ─── DISK SPACE MANAGEMENT ─────────────────────────────────────────────────────
-def check_disk_space():
-    """Check available disk space and clean up if needed"""
-    if not download_folder.exists():
-        download_folder.mkdir(parents=True)
-    
+folder_bytes = 0  # running total, updated incrementally after the startup scan
+lru = collections.OrderedDict()  # Path -> (size, mtime), oldest first
+lru_file = progress_file.with_suffix('.lru')
+
+def _scan_folder():
+    """Yield (path, size, mtime) for every file in the download folder"""
+    stack = [str(download_folder)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat()  # one stat per entry, served from the scandir cache
+                    yield Path(entry.path), st.st_size, st.st_mtime
+
+def init_disk_usage():
+    """One-time startup scan seeding folder_bytes and the LRU eviction index"""
+    global folder_bytes
+    download_folder.mkdir(parents=True, exist_ok=True)
+
+    lru.clear()
+    for path, size, mtime in sorted(_scan_folder(), key=lambda x: x[2]):
+        lru[path] = (size, mtime)
+    if lru_file.exists():
+        # Replay last session's access order for files that still exist
+        try:
+            for name in _json_loads(lru_file.read_bytes()):
+                path = Path(name)
+                if path in lru:
+                    lru.move_to_end(path)
+        except Exception as e:
+            logger.error(f"Failed to load LRU index: {e}")
+    folder_bytes = sum(size for size, _ in lru.values())
+
     total, used, free = shutil.disk_usage(download_folder)
-    free_gb = free / (1024**3)
-    folder_size_gb = sum(f.stat().st_size for f in download_folder.glob('**/*') if f.is_file()) / (1024**3)
-    
-    logger.info(f"Disk space: {free_gb:.2f} GB free, folder using {folder_size_gb:.2f} GB")
-    
-    if folder_size_gb > max_disk_usage_gb:
-        logger.warning(f"Folder size {folder_size_gb:.2f} GB exceeds limit of {max_disk_usage_gb} GB. Cleaning...")
-        files = [(f, f.stat().st_mtime) for f in download_folder.glob('**/*') if f.is_file()]
-        files.sort(key=lambda x: x[1])
-        
-        for file_path, _ in files:
-            if folder_size_gb <= max_disk_usage_gb * 0.9:
-                break
-                
-            size_gb = file_path.stat().st_size / (1024**3)
-            logger.info(f"Deleting old file: {file_path} ({size_gb:.2f} GB)")
-            try:
-                file_path.unlink()
-                folder_size_gb -= size_gb
-            except Exception as e:
-                logger.error(f"Failed to delete {file_path}: {e}")
+    logger.info(f"Disk space: {free / 1024**3:.2f} GB free, "
+                f"folder using {folder_bytes / 1024**3:.2f} GB")
+
+def select_victims():
+    """Pop LRU entries until projected usage is back under 90% of the limit"""
+    global folder_bytes
+    limit = max_disk_usage_gb * 1024**3
+    victims = []
+    while lru and folder_bytes > limit * 0.9:
+        file_path, (size, _) = lru.popitem(last=False)
+        victims.append((file_path, size))
+        folder_bytes -= size
+    return victims
+
+def _drop_page_cache(path):
+    """Hint the kernel to evict the file's pages; downloads aren't re-read here"""
+    if not hasattr(os, 'posix_fadvise'):  # not available on Windows
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def _unlink_quiet(file_path):
+    try:
+        file_path.unlink()
+    except Exception as e:
+        logger.error(f"Failed to delete {file_path}: {e}")
+
+async def check_disk_space():
+    """Constant-time quota check; evicts in one batched unlink burst"""
+    if folder_bytes <= max_disk_usage_gb * 1024**3:
+        return
+
+    logger.warning(f"Folder size {folder_bytes / 1024**3:.2f} GB exceeds limit of "
+                   f"{max_disk_usage_gb} GB. Cleaning...")
+    victims = select_victims()
+    await asyncio.gather(*[asyncio.to_thread(_unlink_quiet, p) for p, _ in victims])
+    freed_gb = sum(size for _, size in victims) / 1024**3
+    logger.info(f"Evicted {len(victims)} files, {freed_gb:.2f} GB")
+
+def save_lru():
+    """Persist the eviction order so restarts keep the approximate LRU"""
+    try:
+        lru_file.write_bytes(_json_dumps([str(p) for p in lru]))
+    except Exception as e:
+        logger.error(f"Failed to save LRU index: {e}")
 
 # ─── PROGRESS TRACKING ─────────────────────────────────────────────────────────
-def load_progress():
-    """Load progress data from file"""
+processed_ids = BitMap() if BitMap else set()
+last_id = 0
+progress_log_file = progress_file.with_suffix('.ndjson')
+bitmap_file = progress_file.with_suffix('.rb')
+_log_fh = None
+
+def _load_progress_sync():
+    """Rebuild progress state from the JSON snapshot plus the append-only log"""
+    global last_id
+    if BitMap and bitmap_file.exists():
+        try:
+            processed_ids.update(BitMap.deserialize(bitmap_file.read_bytes()))
+        except Exception as e:
+            logger.error(f"Failed to load id bitmap: {e}")
     if progress_file.exists():
         try:
-            with open(progress_file, 'r') as f:
-                data = json.load(f)
-                logger.info(f"Loaded progress: {data}")
-                return data
+            data = _json_loads(progress_file.read_bytes())
+            # last_id is a resume floor, not a max over completed ids:
+            # workers finish out of order, so it only comes from the snapshot
+            last_id = data.get("last_id", 0)
+            processed_ids.update(data.get("processed_ids", []))
         except Exception as e:
             logger.error(f"Failed to load progress: {e}")
-    
-    return {"last_id": 0, "processed_ids": []}
+    if progress_log_file.exists():
+        try:
+            with open(progress_log_file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        processed_ids.add(int(line))
+        except Exception as e:
+            logger.error(f"Failed to load progress log: {e}")
+    logger.info(f"Loaded progress: last_id={last_id}, {len(processed_ids)} processed ids")
 
-def save_progress(last_id, processed_ids=None):
-    """Save progress data to file"""
-    if processed_ids is None:
-        processed_ids = []
-        
-    data = {"last_id": last_id, "processed_ids": processed_ids}
-    
+def open_progress_log():
+    """Open the append-only log used for per-message progress writes"""
+    global _log_fh
+    # Line buffering makes each one-line delta durable on its own, so a
+    # crash loses at most the message in flight
+    _log_fh = open(progress_log_file, 'a', buffering=1)
+
+def mark_processed(msg_id):
+    """Record a processed id: O(1) set add plus one appended log line"""
+    if msg_id in processed_ids:
+        return
+    processed_ids.add(msg_id)
+    if _log_fh:
+        _log_fh.write(f"{msg_id}\n")
+
+def _save_progress_sync():
+    """Compact the set and log into the JSON snapshot (shutdown only)"""
     try:
-        with open(progress_file, 'w') as f:
-            json.dump(data, f)
-        logger.info(f"Saved progress: {data}")
+        if BitMap:
+            # The id set lives in the compact binary bitmap; the JSON stays tiny
+            bitmap_file.write_bytes(processed_ids.serialize())
+            data = {"last_id": last_id}
+        else:
+            data = {"last_id": last_id, "processed_ids": sorted(processed_ids)}
+        progress_file.write_bytes(_json_dumps(data))
+        if _log_fh:
+            _log_fh.flush()
+            _log_fh.truncate(0)  # everything is folded into the snapshot now
+        logger.info(f"Saved progress: last_id={last_id}, {len(processed_ids)} processed ids")
     except Exception as e:
         logger.error(f"Failed to save progress: {e}")
 
+def seed_from_files():
+    """Mark ids parsed from existing '<id>_name' files as already processed"""
+    seeded = 0
+    for path in lru:  # already filled by init_disk_usage, no extra scan needed
+        if path.suffix == '.part':
+            continue  # interrupted download, must be re-fetched
+        prefix = path.name.split('_', 1)[0]
+        if prefix.isdigit() and int(prefix) not in processed_ids:
+            processed_ids.add(int(prefix))
+            seeded += 1
+    if seeded:
+        logger.info(f"Seeded {seeded} processed ids from existing files")
+
+# Async wrappers so coroutines never block the event loop on disk I/O
+async def load_progress():
+    await asyncio.to_thread(_load_progress_sync)
+
+async def save_progress():
+    await asyncio.to_thread(_save_progress_sync)
+
+# ─── ADAPTIVE CONCURRENCY ──────────────────────────────────────────────────────
+class AdaptiveSemaphore:
+    """AIMD concurrency cap: shrink on FloodWait, slowly regrow on success"""
+    def __init__(self, start, lo=1, hi=8):
+        self.limit = start
+        self.lo = lo
+        self.hi = hi
+        self.active = 0
+        self._cond = asyncio.Condition()
+        self._last_flood = time.time()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def shrink(self):
+        """Additive decrease after a FloodWait"""
+        if self.limit > self.lo:
+            self.limit -= 1
+            logger.warning(f"Concurrency lowered to {self.limit} after FloodWait")
+        self._last_flood = time.time()
+
+    async def maybe_grow(self):
+        """Additive increase after a sustained flood-free minute"""
+        if self.limit < self.hi and time.time() - self._last_flood > 60:
+            async with self._cond:
+                self.limit += 1
+                self._cond.notify_all()
+            self._last_flood = time.time()
+            logger.info(f"No floods for 60s: concurrency raised to {self.limit}")
+
+# ─── PARALLEL DOWNLOAD ─────────────────────────────────────────────────────────
+parallel_parts = int(os.getenv('PARALLEL_PARTS', '4'))
+request_size = 512 * 1024  # must stay 4 KiB-aligned for iter_download offsets
+
+async def _dl_part(msg, start, end, path, counters, idx):
+    """Download one byte range of a message through its own file handle"""
+    # limit counts yielded chunks, not bytes; start is request_size-aligned
+    chunks = -(-(end - start) // request_size)
+    # A private handle per part keeps the writes portable (os.pwrite does
+    # not exist on Windows) and each part's position independent
+    def _open_at():
+        f = open(path, 'r+b')
+        f.seek(start)
+        return f
+    f = await asyncio.to_thread(_open_at)
+    try:
+        async for chunk in client.iter_download(msg, offset=start, limit=chunks,
+                                                request_size=request_size):
+            # Write through the thread pool so a slow disk never back-pressures
+            # the socket reads running on the event loop
+            await asyncio.to_thread(f.write, chunk)
+            counters[idx] += len(chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+
+async def download_parallel(msg, fpath, n=None):
+    """Download a video as n concurrent byte-range parts (Telegram throttles
+    per connection, so parts multiply throughput)"""
+    n = n or parallel_parts
+    size = msg.file.size
+    # Align part boundaries to request_size so offsets stay valid
+    part = -(-size // n)
+    part += (-part) % request_size
+    ranges = [(i * part, min((i + 1) * part, size)) for i in range(n)
+              if i * part < size]
+
+    # Download under a .part name so fpath only ever names complete files
+    part_path = fpath.with_suffix(fpath.suffix + '.part')
+    fd = os.open(str(part_path), os.O_CREAT | os.O_WRONLY, 0o644)
+    try:
+        # Reserve the extents up front: part writers never race on extend and
+        # the filesystem lays the file out contiguously
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, size)
+        else:
+            os.truncate(fd, size)
+    finally:
+        os.close(fd)
+    counters = [0] * len(ranges)
+    tasks = [asyncio.create_task(_dl_part(msg, s, e, part_path, counters, i))
+             for i, (s, e) in enumerate(ranges)]
+    ok = False
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=0.2)
+            _progress(sum(counters), size, '⬇️ Download', str(msg.id))
+            for t in done:
+                if t.exception():
+                    raise t.exception()
+        _progress(size, size, '⬇️ Download', str(msg.id))
+        ok = True
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        # Drain the tasks so every part handle is closed and no thread-pool
+        # write is still in flight before the partial file is unlinked
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        if not ok:
+            await asyncio.to_thread(_unlink_quiet, part_path)
+    await asyncio.to_thread(os.replace, str(part_path), str(fpath))
+
 # ─── MAIN DOWNLOAD FUNCTION ────────────────────────────────────────────────────
+def is_eligible(msg):
+    """Cheap sync filter so non-videos never cost a coroutine or queue slot"""
+    return bool(msg.video and msg.file and msg.file.mime_type == "video/mp4"
+                and min_file_size <= msg.file.size <= max_file_size)
+
 async def download_message(msg):
-    """Download a single message's video"""
-    global stats
-    
-    # Check if it's a video file
-    if not (msg.video and msg.file and msg.file.mime_type == "video/mp4"):
-        logger.info(f"Skipping non-video message {msg.id}")
-        stats.skipped += 1
-        return False
-        
-    # Check file size
-    if not (min_file_size <= msg.file.size <= max_file_size):
-        logger.info(f"Skipping message {msg.id} - size out of bounds: {msg.file.size / 1024 / 1024:.2f} MB")
-        stats.skipped += 1
-        return False
+    """Download a single message's video (caller has checked is_eligible)"""
+    global stats, folder_bytes
 
     # Create clean filename
-    clean_name = ''.join(c if c.isalnum() or c in '._- ' else '_' for c in msg.file.name or 'video.mp4')
+    clean_name = _sanitize.sub('_', msg.file.name or 'video.mp4')
     fname = f"{msg.id}_{clean_name}"
     fpath = download_folder / fname
     size_mb = msg.file.size / 1024 / 1024
     
-    download_url = f"https://t.me/c/{str(source_group)[4:]}/{msg.id}"
+    download_url = f"https://t.me/c/{_group_suffix}/{msg.id}"
     logger.info(f"Processing message {msg.id}: {clean_name} ({size_mb:.2f} MB)")
     print(f"\n⬇️ Downloading {fname} ({size_mb:.2f} MB)")
     print(f"🔗 {download_url}")
 
-    # Reset skip flag
-    stats.skip_current = False
+    # Register a skip event so 'ss' can target this download alone
+    skip_events[msg.id] = asyncio.Event()
 
     # Check disk space before download
-    check_disk_space()
+    await check_disk_space()
 
     # Download if not already present
     if not fpath.exists():
         try:
-            await msg.download_media(
-                file=str(fpath),
-                progress_callback=lambda c, t: _progress(c, t, '⬇️ Download', str(msg.id))
-            )
+            await download_parallel(msg, fpath)
             stats.downloaded += 1
+            fsize = (await asyncio.to_thread(fpath.stat)).st_size
+            folder_bytes += fsize
+            lru[fpath] = (fsize, time.time())
+            lru.move_to_end(fpath)
+            await asyncio.to_thread(_drop_page_cache, str(fpath))
             logger.info(f"Downloaded {fname} ({size_mb:.2f} MB)")
             print(f"\n✅ Downloaded ({size_mb:.2f} MB)")
+        except FloodWaitError:
+            raise  # handled by the worker with a sleep and retry
         except Exception as e:
             if "Skipped by user" in str(e):
                 stats.skipped += 1
-                stats.skip_current = False
                 logger.info(f"Download skipped by user: {msg.id}")
                 print("\n⏩ Download skipped by user.")
                 return True
-            
+
             logger.error(f"Download failed for message {msg.id}: {e}")
             print(f"\n❌ Download failed: {str(e)[:100]}...")
             stats.failed += 1
             return True
+        finally:
+            skip_events.pop(msg.id, None)
     else:
+        skip_events.pop(msg.id, None)
         logger.info(f"File already exists: {fpath}")
         print("📁 Already downloaded – skipping.")
 
-    # Save progress
-    progress_data = load_progress()
-    progress_data["last_id"] = max(msg.id, progress_data.get("last_id", 0))
-    if msg.id not in progress_data.get("processed_ids", []):
-        progress_data["processed_ids"].append(msg.id)
-    save_progress(progress_data["last_id"], progress_data.get("processed_ids", []))
+    # Record progress (set add + one appended log line)
+    mark_processed(msg.id)
 
     return True
 
 # ─── MAIN PROGRAM ──────────────────────────────────────────────────────────────
 async def main():
     """Main program loop"""
-    global client, stats
+    global client, stats, last_id
     
     print("Made by Twisted Fate [fxp]")
     print("=" * 50)
     
     # Setup
     setup_signal_handlers()
-    threading.Thread(target=key_listener, daemon=True).start()
-    download_folder.mkdir(parents=True, exist_ok=True)
+    setup_skip_listener()
+    await asyncio.to_thread(init_disk_usage)
     
     logger.info(f"Starting downloader for source: {source_group}")
     print(f"📱 Telegram Video Downloader")
@@ -285,35 +557,82 @@ async def main():
     print("-" * 50)
     
     # Connect to Telegram
-    client = TelegramClient(session_name, api_id, api_hash)
+    client = TelegramClient(
+        session_name, api_id, api_hash,
+        connection_retries=10,
+        retry_delay=2,
+        auto_reconnect=True,
+        flood_sleep_threshold=60,  # Telethon sleeps through short waits itself
+    )
     await client.start()
     logger.info("Connected to Telegram")
     
     # Load progress
-    progress_data = load_progress()
-    last_id = progress_data.get("last_id", 0)
-    processed_ids = set(progress_data.get("processed_ids", []))
-    
+    await load_progress()
+    open_progress_log()
+    seed_from_files()
+
     logger.info(f"Resuming from message ID: {last_id}, {len(processed_ids)} already processed")
     print(f"▶️ Resuming from message ID: {last_id}")
     
     try:
-        # Get messages
-        it = client.iter_messages(source_group, reverse=True, min_id=last_id)
+        # Pipeline message discovery and downloading: the iterator feeds a
+        # bounded queue drained by a small pool of workers
+        queue = asyncio.Queue(maxsize=8)
+        sem = AdaptiveSemaphore(worker_count, hi=max(worker_count, 8))
         processed_in_session = 0
-        
-        async for msg in it:
+
+        async def worker():
+            nonlocal processed_in_session
+            while True:
+                msg = await queue.get()
+                try:
+                    async with sem:
+                        while True:
+                            try:
+                                if await download_message(msg):
+                                    processed_in_session += 1
+                                await sem.maybe_grow()
+                                break
+                            except FloodWaitError as e:
+                                # Wait it out here; never let one flood tear
+                                # down the connection for every worker
+                                sem.shrink()
+                                logger.warning(f"FloodWait on message {msg.id}: "
+                                               f"sleeping {e.seconds}s")
+                                await asyncio.sleep(e.seconds + 1)
+                            except Exception as e:
+                                # A dead worker would leave the producer
+                                # blocked on queue.put with no diagnostics
+                                logger.error(f"Worker error on message {msg.id}: {e}")
+                                stats.failed += 1
+                                break
+                finally:
+                    queue.task_done()
+
+        # Spawn up to the cap; the semaphore decides how many actually run
+        workers = [asyncio.create_task(worker()) for _ in range(sem.hi)]
+
+        produced_up_to = last_id
+        async for msg in client.iter_messages(source_group, reverse=True, min_id=last_id):
+            produced_up_to = msg.id
             # Skip already processed messages
             if msg.id in processed_ids:
                 logger.info(f"Skipping already processed message: {msg.id}")
                 continue
-                
-            # Download message
-            processed = await download_message(msg)
-            
-            if processed:
-                processed_in_session += 1
-        
+            if not is_eligible(msg):
+                logger.info(f"Skipping ineligible message {msg.id}")
+                stats.skipped += 1
+                continue
+            await queue.put(msg)
+
+        await queue.join()
+        # Everything up to the iterator's position has drained, so the resume
+        # floor may advance now - never on individual out-of-order completions
+        last_id = max(last_id, produced_up_to)
+        for w in workers:
+            w.cancel()
+
         logger.info(f"Processed {processed_in_session} messages in this session")
         print("\n🎉 All done! No more videos to download.")
         print_summary()
@@ -323,10 +642,19 @@ async def main():
         print(f"\n❌ Error: {e}")
     
     finally:
+        await save_progress()
+        await asyncio.to_thread(save_lru)
         await client.disconnect()
         print("\nPress Enter to exit...")
         
 if __name__ == "__main__":
+    try:
+        # uvloop noticeably speeds up the socket-bound download path
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt: